@@ -2,6 +2,31 @@
 Functions to generate dummy parameters for dihedrals and angle types.
 """
 
+# Import the re module for regular expressions
+import re
+
+# Import the io module to build output files in memory
+import io
+
+# Import the os module to create output directories
+import os
+
+# Import the output buffer size and the screen message buffer from our error_finding.py file
+from error_finding import WRITE_BUFFER_SIZE, log_message, flush_log
+
+# Default values for angle parameters, already formatted:
+# func = 1, theta0 = 120.0, ktheta = 200.0, ub0 = 0.0, kub = 0.0
+# They never change, so only the atom types are formatted for each dummy
+_ANGLE_TAIL = "     1   120.000000   200.000000   0.00000000         0.00 ;"
+
+# Default values for dihedral parameters, already formatted:
+# func = 9, phi0 = 0.0, kphi = 0.0, mult = 1
+_DIHED_TAIL = "\t\t9       0.000000       0.000000     1 ;"
+
+# Pattern for the (lowercase) error messages that mean a missing angle type
+# One search replaces two separate substring checks
+_ANGLE_MSG_RE = re.compile(r'no default u-b types|angle type')
+
 def generate_angle_dummy(atom_types):
     """
     Generates a dummy angle type parameter for the given atom types.
@@ -15,14 +40,9 @@ def generate_angle_dummy(atom_types):
     if len(atom_types) != 3:
         return None
     
-    # Default values for angle parameters
-    theta0 = 120.0
-    ktheta = 200.0
-    ub0 = 0.0
-    kub = 0.0
-    
     # Format the angle type parameter
-    return f"{atom_types[0]:>8} {atom_types[1]:>8} {atom_types[2]:>8}     1   {theta0:10.6f}   {ktheta:10.6f}   {ub0:10.8f}   {kub:10.2f} ;"
+    a, b, c = atom_types
+    return f"{a:>8} {b:>8} {c:>8}{_ANGLE_TAIL}"
 
 
 def generate_dihedral_dummy(atom_types):
@@ -38,13 +58,9 @@ def generate_dihedral_dummy(atom_types):
     if len(atom_types) != 4:
         return None
     
-    # Default values for dihedral parameters
-    phi0 = 0.0
-    kphi = 0.0
-    mult = 1
-    
     # Format the dihedral type parameter
-    return f"{atom_types[0]:>8} {atom_types[1]:>8} {atom_types[2]:>8} {atom_types[3]:>8}\t\t9     {phi0:10.6f}     {kphi:10.6f}     {mult} ;"
+    a, b, c, d = atom_types
+    return f"{a:>8} {b:>8} {c:>8} {d:>8}{_DIHED_TAIL}"
 
 
 def process_errors_for_dummies(errors):
@@ -57,8 +73,10 @@ def process_errors_for_dummies(errors):
     Returns:
         A dictionary with dummy parameters for angles and dihedrals
     """
-    angle_dummies = set()
-    dihedral_dummies = set()
+    # Dummies keyed by the tuple of atom types, so a repeated set of
+    # atom types is found without formatting its dummy line again
+    angle_dummies = {}
+    dihedral_dummies = {}
     
     # Counters for statistics
     total_errors = len(errors)
@@ -76,54 +94,60 @@ def process_errors_for_dummies(errors):
             continue
         
         # Check the error message to determine what kind of dummy to generate
+        # Lowercase the message and the section only once per error
         error_msg = error['error_msg'].lower()
         error_line = error['line_number']
-        section = None
         
         # Determine the section based on the error line
-        if 'section' in error:
-            section = error['section']
+        section = (error.get('section') or '').lower()
         
-        # For angle errors - look for specific error messages or section information
-        if ('no default u-b types' in error_msg or 
-            'angle type' in error_msg or 
-            (section and 'angle' in section.lower())):
+        # For angle errors - look for section information (cheapest check) or specific error messages
+        if 'angle' in section or _ANGLE_MSG_RE.search(error_msg):
             
             # Check if we have the right number of atom types
             if len(error['atom_types']) == 3:
-                dummy = generate_angle_dummy(error['atom_types'])
+                key = tuple(error['atom_types'])
+                dummy = angle_dummies.get(key)
+                if dummy is None:
+                    dummy = generate_angle_dummy(error['atom_types'])
+                    if dummy:
+                        angle_dummies[key] = dummy
                 if dummy:
-                    angle_dummies.add(dummy)
                     processed_errors += 1
-                    print(f"Generated angle dummy for error at line {error_line}: {error['atom_types']}")
+                    log_message(f"Generated angle dummy for error at line {error_line}: {error['atom_types']}")
                 else:
                     skipped_wrong_atom_count += 1
             else:
                 skipped_wrong_atom_count += 1
-                print(f"Skipped angle error at line {error_line} - wrong atom count: {len(error['atom_types'])}")
+                log_message(f"Skipped angle error at line {error_line} - wrong atom count: {len(error['atom_types'])}")
         
-        # For dihedral errors - look for specific error messages or section information
-        elif ('no default dihedral type' in error_msg or 
-              'dihedral type' in error_msg or 
-              (section and 'dihedral' in section.lower())):
+        # For dihedral errors - look for section information (cheapest check) or specific error messages
+        elif 'dihedral' in section or 'dihedral type' in error_msg:
             
             # Check if we have the right number of atom types
             if len(error['atom_types']) == 4:
-                dummy = generate_dihedral_dummy(error['atom_types'])
+                key = tuple(error['atom_types'])
+                dummy = dihedral_dummies.get(key)
+                if dummy is None:
+                    dummy = generate_dihedral_dummy(error['atom_types'])
+                    if dummy:
+                        dihedral_dummies[key] = dummy
                 if dummy:
-                    dihedral_dummies.add(dummy)
                     processed_errors += 1
-                    print(f"Generated dihedral dummy for error at line {error_line}: {error['atom_types']}")
+                    log_message(f"Generated dihedral dummy for error at line {error_line}: {error['atom_types']}")
                 else:
                     skipped_wrong_atom_count += 1
             else:
                 skipped_wrong_atom_count += 1
-                print(f"Skipped dihedral error at line {error_line} - wrong atom count: {len(error['atom_types'])}")
+                log_message(f"Skipped dihedral error at line {error_line} - wrong atom count: {len(error['atom_types'])}")
         
         # Unknown error type
         else:
             skipped_unknown_error += 1
-            print(f"Skipped unknown error type at line {error_line}: {error_msg[:50]}...")
+            log_message(f"Skipped unknown error type at line {error_line}: {error_msg[:50]}...")
+    
+    # Write the messages from the loop to the screen
+    flush_log()
     
     # Print statistics
     print(f"\nDummy parameter generation statistics:")
@@ -136,8 +160,8 @@ def process_errors_for_dummies(errors):
     print(f"  Generated dihedral dummies: {len(dihedral_dummies)}")
     
     return {
-        'angles': sorted(list(angle_dummies)),
-        'dihedrals': sorted(list(dihedral_dummies))
+        'angles': sorted(angle_dummies.values()),
+        'dihedrals': sorted(dihedral_dummies.values())
     }
 
 
@@ -149,40 +173,45 @@ def save_dummies(dummies, output_file):
         dummies: Dictionary with dummy parameters
         output_file: Path to the output file
     """
+    angles = dummies.get('angles')
+    dihedrals = dummies.get('dihedrals')
+    
+    # Build the whole file in memory first
+    buf = io.StringIO()
+    
+    # Write a header
+    buf.write("; Dummy parameters generated for topology errors\n\n")
+    
+    # Write angle types if available, all lines joined in one write
+    if angles:
+        buf.write("[ angletypes ]\n")
+        buf.write(";      i        j        k  func       theta0       ktheta          ub0          kub\n")
+        buf.write("\n".join(angles) + "\n\n")
+    
+    # Write dihedral types if available, all lines joined in one write
+    if dihedrals:
+        buf.write("[ dihedraltypes ]\n")
+        buf.write(";      i        j        k        l  func         phi0         kphi  mult\n")
+        buf.write("\n".join(dihedrals) + "\n\n")
+    
+    # Write a footer
+    buf.write("; End of dummy parameters\n")
+    
     try:
         # Create the output directory if it doesn't exist
-        import os
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        
-        # Open the output file
-        with open(output_file, 'w') as file:
-            # Write a header
-            file.write("; Dummy parameters generated for topology errors\n\n")
-            
-            # Write angle types if available
-            if dummies['angles']:
-                file.write("[ angletypes ]\n")
-                file.write(";      i        j        k  func       theta0       ktheta          ub0          kub\n")
-                for angle in dummies['angles']:
-                    file.write(f"{angle}\n")
-                file.write("\n")
-            
-            # Write dihedral types if available
-            if dummies['dihedrals']:
-                file.write("[ dihedraltypes ]\n")
-                file.write(";      i        j        k        l  func         phi0         kphi  mult\n")
-                for dihedral in dummies['dihedrals']:
-                    file.write(f"{dihedral}\n")
-                file.write("\n")
-            
-            # Write a footer
-            file.write("; End of dummy parameters\n")
+        # (a bare file name has no directory to create)
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
         
-        print(f"Dummy parameters saved to {output_file}")
+        # Open the output file with a large buffer and write everything at once
+        with open(output_file, 'w', buffering=WRITE_BUFFER_SIZE) as file:
+            file.write(buf.getvalue())
         
-    except Exception as e:
-        # Handle any errors that might occur
+    except OSError as e:
+        # Handle any errors that might occur while writing the file
         print(f"Error saving dummy parameters: {e}")
         return False
     
+    print(f"Dummy parameters saved to {output_file}")
     return True
@@ -2,8 +2,67 @@
 Functions to read and analyze error and topology files.
 """
 
-# Import the re module for regular expressions
-import re
+# Import the bisect module for binary search on sorted lists
+import bisect
+
+# Import a process pool to identify atoms for many errors in parallel
+from concurrent.futures import ProcessPoolExecutor
+
+# Import the io module to build output files in memory
+import io
+
+# Import the os module to create output directories
+import os
+
+# Import the sys module to write to the screen
+import sys
+
+# Every error in the grompp output starts with "ERROR X [file topol.top, line Y]:"
+# at the beginning of a line, so the errors can be found with plain string splitting
+_ERROR_START = "\nERROR "
+_ERROR_FILE_TAG = " [file topol.top, line "
+_ERROR_TAG_END = "]:"
+
+# The topology sections we're looking for
+_SECTIONS = ('[ atoms ]', '[ bonds ]', '[ pairs ]', '[ angles ]', '[ dihedrals ]')
+
+# Map the lowercase form of each section to its name, built once at import,
+# so each topology line needs only one lower() call and one lookup
+_SECTIONS_LC = {section.lower(): section for section in _SECTIONS}
+
+# Buffer size used when writing output files (128 KiB)
+WRITE_BUFFER_SIZE = 128 * 1024
+
+# When to use a process pool, based on timing the bundled example repeated to 100k errors:
+# identifying one error takes about 10 us directly, but about 20 us of CPU time in
+# total through the pool (sending the errors and results between processes), plus
+# about 10 ms to start the pool. So the pool can only win with at least 4 CPUs,
+# and then only for a few thousand errors or more
+_PARALLEL_MIN_CPUS = 4
+_PARALLEL_MIN_ERRORS = 5000
+
+# Number of errors sent to a worker process at a time
+_PARALLEL_CHUNK_SIZE = 256
+
+# Separator printed after each displayed error
+_SEP = "-" * 40
+
+# Messages from the per-error functions (here and in dummies.py) are collected
+# here and written to the screen in one go by flush_log(), instead of one print() per line
+_log_buf = []
+
+
+def log_message(msg):
+    """Adds a message to the log buffer."""
+    _log_buf.append(msg)
+
+
+def flush_log():
+    """Writes all buffered messages to the screen at once and empties the buffer."""
+    if _log_buf:
+        sys.stdout.write("\n".join(_log_buf) + "\n")
+        _log_buf.clear()
+
 
 def extract_error_info(error_file_path):
     """
@@ -28,20 +87,26 @@ def extract_error_info(error_file_path):
             print("No error content to process.")
             return errors
         
-        # Use pattern matching to find errors
-        # Pattern: "ERROR X [file topol.top, line Y]: Message"
-        error_pattern = r'ERROR (\d+) \[file topol\.top, line (\d+)\]:\s+(.*?)(?=\n\n|\Z)'
-        
-        # Find all matches in the content
-        # re.DOTALL allows the dot (.) to match newlines as well
-        matches = re.finditer(error_pattern, error_content, re.DOTALL)
+        # Split the content into chunks, one per "ERROR " at the start of a line
+        # A newline is added in front so an error on the very first line is found too
+        chunks = ("\n" + error_content).split(_ERROR_START)
         
-        # For each match:
-        for match in matches:
-            # Extract error number, line number, and message
-            error_num = int(match.group(1))
-            line_num = int(match.group(2))
-            error_msg = match.group(3).strip()
+        # The first chunk is whatever came before the first error, so skip it
+        for chunk in chunks[1:]:
+            # Split "X [file topol.top, line Y]: Message" into its parts
+            num_part, tag, rest = chunk.partition(_ERROR_FILE_TAG)
+            line_part, tag_end, body = rest.partition(_ERROR_TAG_END)
+            
+            # Skip anything that doesn't look like a topology error header
+            if not tag or not tag_end or not num_part.isdigit() or not line_part.isdigit():
+                continue
+            
+            # Extract error number and line number
+            error_num = int(num_part)
+            line_num = int(line_part)
+            
+            # Keep only the first paragraph of the message (up to the first blank line)
+            error_msg = body.lstrip().split('\n\n', 1)[0].strip()
             
             # Add to errors list
             errors.append({
@@ -62,158 +127,208 @@ def extract_error_info(error_file_path):
         return []
 
 
-def get_context_from_topology(topology_file):
+def new_atom_info():
     """
-    Reads the topology file and finds where specific sections start.
+    Creates an empty atom information table.
+    
+    The table is four lists that line up with each other and are indexed
+    directly by atom number: names, types, residue numbers and residue names.
+    The lists grow as atoms are added; index 0 and any atom number
+    not in the topology hold None.
+    
+    Returns:
+        A tuple of four empty lists (names, types, resnrs, residues)
+    """
+    return [], [], [], []
+
+
+def add_atom(atom_info, tokens, max_atom_num):
+    """
+    Stores one line of the atoms section in the atom information table.
+    
+    Args:
+        atom_info: Tuple of four lists created by new_atom_info()
+        tokens: Tokens of the atoms line (nr type resnr residue atom ...)
+        max_atom_num: Largest atom number that can be valid
+        
+    Raises:
+        ValueError: If the atom number is not an integer between 1 and max_atom_num
+    """
+    names, types, resnrs, residues = atom_info
+    atom_num = int(tokens[0])
+    
+    # Atom numbers index the lists directly, so they have to start at 1
+    if atom_num < 1:
+        raise ValueError(f"atom number must be positive, got {atom_num}")
+    
+    # Atom numbers are dense, so a number past the limit is a typo and
+    # would only make the lists huge
+    if atom_num > max_atom_num:
+        raise ValueError(f"atom number {atom_num} is larger than possible ({max_atom_num})")
+    
+    # Grow the lists if this atom number is past their end
+    if atom_num >= len(names):
+        missing = [None] * (atom_num + 1 - len(names))
+        for column in atom_info:
+            column.extend(missing)
+    
+    names[atom_num] = tokens[4]
+    types[atom_num] = tokens[1]
+    resnrs[atom_num] = tokens[2]
+    residues[atom_num] = tokens[3]
+
+
+def count_atoms(atom_info):
+    """
+    Counts the atoms stored in the atom information table.
+    
+    Args:
+        atom_info: Tuple of four lists created by new_atom_info()
+        
+    Returns:
+        The number of atom numbers that have information
+    """
+    return sum(1 for name in atom_info[0] if name is not None)
+
+
+def parse_topology(topology_file):
+    """
+    Reads the topology file once and, in a single pass over its lines, finds
+    where the sections start and extracts the atom information.
     
     Args:
         topology_file: Path to the topology file
         
     Returns:
-        A dictionary with section names as keys and their line numbers as values
+        A tuple containing:
+        - A dictionary with section names as keys and their line numbers as values
+        - A tuple of four lists (names, types, resnrs, residues) indexed by atom number
+        - A list with the lines of the topology file (without line endings)
     """
     try:
-        # Define the sections we're looking for
-        sections = ['[ atoms ]', '[ bonds ]', '[ pairs ]', '[ angles ]', '[ dihedrals ]']
-        
-        # Initialize a dictionary to store the line numbers
-        section_lines = {}
-        
-        # Keep track of how many times we've seen each section
-        section_counts = {section: 0 for section in sections}
-        
-        # Open the topology file
+        # Read the file in one go and split it into lines
+        # Only newlines end a line, as for grompp; str.splitlines() would also split
+        # on characters like form feeds and shift every later line number
         with open(topology_file, 'r') as file:
-            # Use enumerate to count lines (starting from 1)
-            for i, line in enumerate(file, 1):
-                # Strip whitespace from the line
-                line = line.strip()
-                
-                # Check if the line matches any of our sections
-                for section in sections:
-                    if line.lower() == section.lower():
-                        # Increment the count for this section
-                        section_counts[section] += 1
-                        
-                        # For dihedrals, we need to distinguish between proper and improper
-                        if section == '[ dihedrals ]':
-                            if section_counts[section] == 1:
-                                # First occurrence - proper dihedrals
-                                section_lines['[ proper dihedrals ]'] = i
-                            elif section_counts[section] == 2:
-                                # Second occurrence - improper dihedrals
-                                section_lines['[ improper dihedrals ]'] = i
-                        else:
-                            # For other sections, just store the line number
-                            section_lines[section] = i
+            topo_lines = [line.rstrip('\n') for line in file]
         
-        # Print a summary of what we found
-        print(f"Found {len(section_lines)} sections in the topology file:")
-        for section in ['[ atoms ]', '[ bonds ]', '[ pairs ]', '[ angles ]', '[ proper dihedrals ]', '[ improper dihedrals ]']:
-            if section in section_lines:
-                print(f"  {section}: Line {section_lines[section]}")
+    except (OSError, UnicodeDecodeError) as e:
+        # Handle any errors that might occur while reading the file
+        print(f"Error reading topology file: {e}")
+        return {}, new_atom_info(), []
+    
+    # Initialize a dictionary to store the line numbers and a table for the atoms
+    section_lines = {}
+    atom_info = new_atom_info()
+    
+    # Keep track of how many times we've seen each section
+    section_counts = {section: 0 for section in _SECTIONS}
+    
+    # The section we are currently inside of
+    current_section = None
+    
+    # Use enumerate to count lines (starting from 1)
+    for i, line in enumerate(topo_lines, 1):
+        # Strip whitespace from the line
+        line = line.strip()
+        
+        # Check if the line matches any of our sections
+        section = _SECTIONS_LC.get(line.lower())
+        if section is not None:
+            # Increment the count for this section
+            section_counts[section] += 1
+            current_section = section
+            
+            # For dihedrals, we need to distinguish between proper and improper
+            if section == '[ dihedrals ]':
+                if section_counts[section] == 1:
+                    # First occurrence - proper dihedrals
+                    section_lines['[ proper dihedrals ]'] = i
+                elif section_counts[section] == 2:
+                    # Second occurrence - improper dihedrals
+                    section_lines['[ improper dihedrals ]'] = i
             else:
-                print(f"  {section}: Not found")
+                # For other sections, just store the line number
+                section_lines[section] = i
+            
+            # Only the last atoms section is kept, as with the section line numbers
+            if section == '[ atoms ]':
+                atom_info = new_atom_info()
+            continue
         
-        # Return the dictionary of section lines
-        return section_lines
+        # Everything below only applies to lines inside the atoms section
+        if current_section != '[ atoms ]':
+            continue
         
-    except Exception as e:
-        # Handle any errors that might occur
-        print(f"Error reading topology file: {e}")
-        return {}
+        # Skip empty lines and comments
+        if not line or line.startswith(';'):
+            continue
+        
+        # Split the line into tokens
+        tokens = line.split()
+        
+        # Check if we have enough tokens
+        # Format: nr type resnr residue atom cgnr charge mass typeB chargeB massB
+        if len(tokens) >= 5:
+            # Store atom information, skipping lines that can't be read
+            # so one bad line doesn't lose the rest of the topology
+            try:
+                # There is one line per atom, so no atom number can be
+                # larger than the number of lines in the file
+                add_atom(atom_info, tokens, len(topo_lines))
+            except ValueError as e:
+                print(f"Skipping atoms line {i}: {e}")
+    
+    # Print a summary of what we found
+    print(f"Found {len(section_lines)} sections in the topology file:")
+    for section in ['[ atoms ]', '[ bonds ]', '[ pairs ]', '[ angles ]', '[ proper dihedrals ]', '[ improper dihedrals ]']:
+        if section in section_lines:
+            print(f"  {section}: Line {section_lines[section]}")
+        else:
+            print(f"  {section}: Not found")
+    if '[ atoms ]' not in section_lines:
+        print("Atoms section not found in topology file")
+    print(f"Extracted information for {count_atoms(atom_info)} atoms")
+    
+    return section_lines, atom_info, topo_lines
 
 
-def extract_atom_names(topology_file, section_lines):
+def get_section_boundaries(section_lines):
     """
-    Extracts atom names, types, and residue information from the atoms section of the topology file.
+    Sorts the sections by their start line so they can be searched quickly.
     
     Args:
-        topology_file: Path to the topology file
         section_lines: Dictionary with section line numbers
         
     Returns:
-        A dictionary mapping atom numbers to dictionaries with atom name, type, and residue information
+        A tuple containing:
+        - A sorted list of section start line numbers
+        - A list of section names in the same order
     """
-    try:
-        # Initialize a dictionary to store atom information
-        atom_info = {}
-        
-        # Check if we have the atoms section
-        if '[ atoms ]' not in section_lines:
-            print("Atoms section not found in topology file")
-            return atom_info
-        
-        # Get the start line of the atoms section
-        atoms_start = section_lines['[ atoms ]']
-        
-        # Find the end line of the atoms section
-        atoms_end = float('inf')
-        for section, line in section_lines.items():
-            if line > atoms_start and line < atoms_end:
-                atoms_end = line
-        
-        # Open the topology file
-        with open(topology_file, 'r') as file:
-            # Skip to the atoms section
-            for _ in range(atoms_start):
-                next(file)
-            
-            # Read the atoms section
-            line_num = atoms_start + 1
-            for line in file:
-                # Check if we've reached the end of the atoms section
-                if line_num >= atoms_end:
-                    break
-                
-                # Parse the line
-                line = line.strip()
-                
-                # Skip empty lines and comments
-                if not line or line.startswith(';'):
-                    line_num += 1
-                    continue
-                
-                # Split the line into tokens
-                tokens = line.split()
-                
-                # Check if we have enough tokens
-                # Format: nr type resnr residue atom cgnr charge mass typeB chargeB massB
-                if len(tokens) >= 5:
-                    atom_num = int(tokens[0])
-                    atom_type = tokens[1]
-                    resnr = tokens[2]
-                    residue = tokens[3]
-                    atom_name = tokens[4]
-                    
-                    # Store atom information
-                    atom_info[atom_num] = {
-                        'name': atom_name,
-                        'type': atom_type,
-                        'resnr': resnr,
-                        'residue': residue
-                    }
-                
-                line_num += 1
-        
-        print(f"Extracted information for {len(atom_info)} atoms")
-        return atom_info
-        
-    except Exception as e:
-        # Handle any errors that might occur
-        print(f"Error extracting atom information: {e}")
-        return {}
+    # Sort the sections by their start line
+    boundaries = sorted(section_lines.items(), key=lambda item: item[1])
+    
+    # Split them into two lists that line up with each other
+    section_starts = [line for _, line in boundaries]
+    section_names = [section for section, _ in boundaries]
+    
+    return section_starts, section_names
 
 
-def identify_atoms_from_context(error, section_lines, topology_file, atom_info=None):
+def identify_atoms_from_context(error, section_starts, section_names, topo_lines, tokens_by_line, atom_info=None):
     """
     Identifies atoms involved in an error based on the error line and section.
     
+    The messages describing what was found are added to the log buffer and
+    only reach the screen when flush_log() is called.
+    
     Args:
         error: Dictionary with error information
-        section_lines: Dictionary with section line numbers
-        topology_file: Path to the topology file
-        atom_info: Dictionary mapping atom numbers to atom information (optional)
+        section_starts: Sorted list of section start line numbers
+        section_names: List of section names, in the same order as section_starts
+        topo_lines: List of lines of the topology file
+        tokens_by_line: Dictionary caching the tokens of lines that were already split, by line number
+        atom_info: Tuple of four lists (names, types, resnrs, residues) indexed by atom number (optional)
         
     Returns:
         A tuple containing:
@@ -227,141 +342,216 @@ def identify_atoms_from_context(error, section_lines, topology_file, atom_info=N
         error_line = error['line_number']
         
         # Determine which section the error is in
-        error_section = None
-        for section, start_line in section_lines.items():
-            # If the error line is after this section's start line
-            if error_line >= start_line:
-                # Check if it's before the next section's start line
-                is_last_section = True
-                for next_section, next_start_line in section_lines.items():
-                    if next_start_line > start_line and error_line >= next_start_line:
-                        is_last_section = False
-                        break
-                
-                if is_last_section:
-                    error_section = section
-                    break
+        # The section is the last one that starts at or before the error line
+        idx = bisect.bisect_right(section_starts, error_line) - 1
+        error_section = section_names[idx] if idx >= 0 else None
         
         # If we couldn't determine the section, return empty lists
         if error_section is None:
-            print(f"Could not determine section for error at line {error_line}")
+            log_message(f"Could not determine section for error at line {error_line}")
             return [], [], [], []
         
         # Store the section in the error dictionary
         error['section'] = error_section
         
-        # Read the error line from the topology file
-        with open(topology_file, 'r') as file:
-            # Skip to the error line
-            for i, line in enumerate(file, 1):
-                if i == error_line:
-                    error_line_content = line.strip()
-                    break
-            else:
-                # If we didn't find the line
-                print(f"Could not find line {error_line} in the topology file")
-                return [], [], [], []
+        # Get the error line from the topology lines (line numbers start at 1)
+        if not 1 <= error_line <= len(topo_lines):
+            # If we didn't find the line
+            log_message(f"Could not find line {error_line} in the topology file")
+            return [], [], [], []
+        error_line_content = topo_lines[error_line - 1].strip()
         
         # Parse the line based on the section
         atoms = []
         
-        # Split the line into tokens
-        tokens = error_line_content.split()
+        # Split the line into tokens, reusing them if another error already pointed to this line
+        tokens = tokens_by_line.get(error_line)
+        if tokens is None:
+            tokens = error_line_content.split()
+            tokens_by_line[error_line] = tokens
         
         # Extract atoms based on the section
         if error_section == '[ bonds ]':
             # bonds: atom1 atom2 bond_type
             if len(tokens) >= 2:
-                atoms = [int(tokens[0]), int(tokens[1])]
+                atoms = list(map(int, tokens[:2]))
         
         elif error_section == '[ pairs ]':
             # pairs: atom1 atom2 pair_type
             if len(tokens) >= 2:
-                atoms = [int(tokens[0]), int(tokens[1])]
+                atoms = list(map(int, tokens[:2]))
         
         elif error_section == '[ angles ]':
             # angles: atom1 atom2 atom3 angle_type
             if len(tokens) >= 3:
-                atoms = [int(tokens[0]), int(tokens[1]), int(tokens[2])]
+                atoms = list(map(int, tokens[:3]))
         
         elif error_section == '[ proper dihedrals ]' or error_section == '[ improper dihedrals ]':
             # dihedrals: atom1 atom2 atom3 atom4 dihedral_type
             if len(tokens) >= 4:
-                atoms = [int(tokens[0]), int(tokens[1]), int(tokens[2]), int(tokens[3])]
+                atoms = list(map(int, tokens[:4]))
         
         # Get atom names, residue information, and atom types if available
         atom_name_list = []
         residue_info_list = []
         atom_type_list = []
         
-        if atom_info:
+        if atom_info and atom_info[0]:
+            names, types, resnrs, residues = atom_info
             for atom in atoms:
-                if atom in atom_info:
-                    info = atom_info[atom]
-                    atom_name_list.append(info['name'])
-                    residue_info_list.append(f"{info['residue']}{info['resnr']}")
-                    atom_type_list.append(info['type'])
+                if 0 < atom < len(names) and names[atom] is not None:
+                    atom_name_list.append(names[atom])
+                    residue_info_list.append(f"{residues[atom]}{resnrs[atom]}")
+                    atom_type_list.append(types[atom])
                 else:
                     atom_name_list.append(f"Unknown-{atom}")
                     residue_info_list.append("Unknown")
                     atom_type_list.append("Unknown")
         
         # Print what we found
-        print(f"Error at line {error_line} is in section {error_section}")
-        print(f"  Line content: {error_line_content}")
-        print(f"  Atoms involved: {atoms}")
+        log_message(f"Error at line {error_line} is in section {error_section}")
+        log_message(f"  Line content: {error_line_content}")
+        log_message(f"  Atoms involved: {atoms}")
         if atom_name_list:
-            print(f"  Atom names: {atom_name_list}")
+            log_message(f"  Atom names: {atom_name_list}")
         if residue_info_list:
-            print(f"  Residues: {residue_info_list}")
+            log_message(f"  Residues: {residue_info_list}")
         if atom_type_list:
-            print(f"  Atom types: {atom_type_list}")
+            log_message(f"  Atom types: {atom_type_list}")
         
         return atoms, atom_name_list, residue_info_list, atom_type_list
     
     except Exception as e:
         # Handle any errors that might occur
-        print(f"Error identifying atoms: {e}")
+        log_message(f"Error identifying atoms: {e}")
         return [], [], [], []
 
 
+# Topology data shared by the worker processes, set once per worker by _init_worker()
+_worker_state = ()
+
+
+def _init_worker(section_starts, section_names, topo_lines, atom_info):
+    """Stores the topology data in a worker process so it isn't sent again with every error."""
+    global _worker_state
+    # Each worker keeps its own cache of split lines
+    _worker_state = (section_starts, section_names, topo_lines, {}, atom_info)
+    
+    # A forked worker starts with a copy of the parent's pending messages;
+    # drop them so they aren't sent back and shown a second time
+    _log_buf.clear()
+
+
+def _process_one(error):
+    """
+    Identifies the atoms of one error inside a worker process.
+    
+    Returns:
+        A tuple with the section of the error (or None), the messages
+        logged for it, and the result of identify_atoms_from_context
+    """
+    section_starts, section_names, topo_lines, tokens_by_line, atom_info = _worker_state
+    result = identify_atoms_from_context(error, section_starts, section_names, topo_lines, tokens_by_line, atom_info)
+    
+    # Hand the worker's messages back to the main process
+    messages = _log_buf[:]
+    _log_buf.clear()
+    
+    return error.get('section'), messages, result
+
+
+def identify_atoms_for_errors(errors, section_starts, section_names, topo_lines, atom_info=None):
+    """
+    Identifies the atoms involved in every error.
+    
+    Each error is independent of the others, so on machines with enough CPUs
+    long error lists are split over a pool of worker processes. Otherwise the
+    errors are processed directly.
+    
+    This is a generator: each error is handled (and its messages logged) when
+    its result is asked for, so the caller can log its own output per error.
+    
+    Args:
+        errors: List of dictionaries with error information
+        section_starts: Sorted list of section start line numbers
+        section_names: List of section names, in the same order as section_starts
+        topo_lines: List of lines of the topology file
+        atom_info: Tuple of four lists (names, types, resnrs, residues) indexed by atom number (optional)
+        
+    Yields:
+        The result of identify_atoms_from_context for each error, in the same order
+    """
+    # Not worth starting worker processes for a short list or with few CPUs
+    cpus = os.cpu_count() or 1
+    if len(errors) < _PARALLEL_MIN_ERRORS or cpus < _PARALLEL_MIN_CPUS:
+        # Errors that point to the same line share its tokens through this cache
+        tokens_by_line = {}
+        for error in errors:
+            yield identify_atoms_from_context(error, section_starts, section_names, topo_lines, tokens_by_line, atom_info)
+        return
+    
+    # Give every worker the topology data once, then send it the errors in chunks
+    initargs = (section_starts, section_names, topo_lines, atom_info)
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=initargs) as executor:
+        outcomes = executor.map(_process_one, errors, chunksize=_PARALLEL_CHUNK_SIZE)
+        
+        # The workers changed copies of the errors, so copy the sections and messages back
+        for error, (section, messages, result) in zip(errors, outcomes):
+            if section is not None:
+                error['section'] = section
+            _log_buf.extend(messages)
+            yield result
+
+
 def display_error_and_atoms(error):
     """
     Displays error information and atoms involved in a formatted way.
     
+    The text is added to the log buffer as one block and only reaches the
+    screen when flush_log() is called.
+    
     Args:
         error: Dictionary with error information
     """
     try:
-        # Print error information
-        print(f"Error {error['error_num']}:")
-        print(f"  Line: {error['line_number']}")
-        print(f"  Message: {error['error_msg']}")
-        
-        # Print atoms involved if available
-        if 'atoms' in error and error['atoms']:
-            print(f"  Atoms involved: {', '.join(map(str, error['atoms']))}")
+        # Collect the lines to display, starting with the error information
+        parts = [
+            f"Error {error['error_num']}:",
+            f"  Line: {error['line_number']}",
+            f"  Message: {error['error_msg']}",
+        ]
+        
+        # Add atoms involved if available
+        atoms = error.get('atoms')
+        if atoms:
+            parts.append(f"  Atoms involved: {', '.join(map(str, atoms))}")
             
-            # Print atom names if available
-            if 'atom_names' in error and error['atom_names']:
-                print(f"  Atom names: {', '.join(error['atom_names'])}")
+            # Add atom names if available
+            atom_names = error.get('atom_names')
+            if atom_names:
+                parts.append(f"  Atom names: {', '.join(atom_names)}")
                 
-            # Print atom types if available
-            if 'atom_types' in error and error['atom_types']:
-                print(f"  Atom types: {', '.join(error['atom_types'])}")
+            # Add atom types if available
+            atom_types = error.get('atom_types')
+            if atom_types:
+                parts.append(f"  Atom types: {', '.join(atom_types)}")
                 
-            # Print residue information if available
-            if 'residues' in error and error['residues']:
-                print(f"  Residues: {', '.join(error['residues'])}")
+            # Add residue information if available
+            residues = error.get('residues')
+            if residues:
+                parts.append(f"  Residues: {', '.join(residues)}")
         else:
-            print("  No atoms identified")
+            parts.append("  No atoms identified")
         
-        # Print a separator for readability
-        print("-" * 40)
+        # Add a separator for readability
+        parts.append(_SEP)
+        
+        # Display everything as one joined block
+        log_message("\n".join(parts))
         
     except Exception as e:
         # Handle any errors that might occur
-        print(f"Error displaying information: {e}")
+        log_message(f"Error displaying information: {e}")
         
         
 def save_results(errors, output_file):
@@ -372,55 +562,65 @@ def save_results(errors, output_file):
         errors: List of dictionaries with error information
         output_file: Path to the output file
     """
-    try:
-        # Create the output directory if it doesn't exist
-        import os
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        
-        # Open the output file
-        with open(output_file, 'w') as file:
-            # Write a header
-            file.write("Topology Error Analysis Results\n")
-            file.write("=" * 30 + "\n\n")
-            
-            # Write the number of errors found
-            file.write(f"Total errors found: {len(errors)}\n\n")
+    # Build the whole file in memory first
+    buf = io.StringIO()
+    
+    # Write a header
+    buf.write("Topology Error Analysis Results\n")
+    buf.write("=" * 30 + "\n\n")
+    
+    # Write the number of errors found
+    buf.write(f"Total errors found: {len(errors)}\n\n")
+    
+    # Write information for each error
+    for error in errors:
+        buf.write(f"Error {error['error_num']}:\n")
+        buf.write(f"  Line: {error['line_number']}\n")
+        buf.write(f"  Message: {error['error_msg']}\n")
+        
+        # Write atoms involved if available
+        atoms = error.get('atoms')
+        if atoms:
+            buf.write(f"  Atoms involved: {', '.join(map(str, atoms))}\n")
             
-            # Write information for each error
-            for error in errors:
-                file.write(f"Error {error['error_num']}:\n")
-                file.write(f"  Line: {error['line_number']}\n")
-                file.write(f"  Message: {error['error_msg']}\n")
+            # Write atom names if available
+            atom_names = error.get('atom_names')
+            if atom_names:
+                buf.write(f"  Atom names: {', '.join(atom_names)}\n")
                 
-                # Write atoms involved if available
-                if 'atoms' in error and error['atoms']:
-                    file.write(f"  Atoms involved: {', '.join(map(str, error['atoms']))}\n")
-                    
-                    # Write atom names if available
-                    if 'atom_names' in error and error['atom_names']:
-                        file.write(f"  Atom names: {', '.join(error['atom_names'])}\n")
-                        
-                    # Write atom types if available
-                    if 'atom_types' in error and error['atom_types']:
-                        file.write(f"  Atom types: {', '.join(error['atom_types'])}\n")
-                        
-                    # Write residue information if available
-                    if 'residues' in error and error['residues']:
-                        file.write(f"  Residues: {', '.join(error['residues'])}\n")
-                else:
-                    file.write("  No atoms identified\n")
+            # Write atom types if available
+            atom_types = error.get('atom_types')
+            if atom_types:
+                buf.write(f"  Atom types: {', '.join(atom_types)}\n")
                 
-                # Add a separator
-                file.write("\n" + "-" * 30 + "\n\n")
-            
-            # Write a footer
-            file.write("\nAnalysis completed.\n")
+            # Write residue information if available
+            residues = error.get('residues')
+            if residues:
+                buf.write(f"  Residues: {', '.join(residues)}\n")
+        else:
+            buf.write("  No atoms identified\n")
+        
+        # Add a separator
+        buf.write("\n" + "-" * 30 + "\n\n")
+    
+    # Write a footer
+    buf.write("\nAnalysis completed.\n")
+    
+    try:
+        # Create the output directory if it doesn't exist
+        # (a bare file name has no directory to create)
+        output_dir = os.path.dirname(output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
         
-        print(f"Results saved to {output_file}")
+        # Open the output file with a large buffer and write everything at once
+        with open(output_file, 'w', buffering=WRITE_BUFFER_SIZE) as file:
+            file.write(buf.getvalue())
         
-    except Exception as e:
-        # Handle any errors that might occur
+    except OSError as e:
+        # Handle any errors that might occur while writing the file
         print(f"Error saving results: {e}")
         return False
     
+    print(f"Results saved to {output_file}")
     return True
@@ -3,7 +3,7 @@ Main program to analyze errors in topology files.
 """
 
 # Import the functions from our error_finding.py file
-from error_finding import extract_error_info, get_context_from_topology, identify_atoms_from_context, display_error_and_atoms, save_results, extract_atom_names
+from error_finding import extract_error_info, parse_topology, get_section_boundaries, identify_atoms_for_errors, display_error_and_atoms, save_results, flush_log
 
 # Import the functions from our dummies.py file
 from dummies import process_errors_for_dummies, save_dummies
@@ -24,13 +24,12 @@ def main():
     print(f"\nExtracting error information from {error_file}...")
     errors = extract_error_info(error_file)
     
-    # Find sections in the topology file
-    print(f"\nFinding sections in {topology_file}...")
-    sections = get_context_from_topology(topology_file)
+    # Read the topology file once, finding its sections and extracting atom information in one pass
+    print(f"\nParsing {topology_file}...")
+    sections, atom_info, topo_lines = parse_topology(topology_file)
     
-    # Extract atom information from the topology file
-    print(f"\nExtracting atom information from {topology_file}...")
-    atom_info = extract_atom_names(topology_file, sections)
+    # Sort the sections by start line so each error's section can be found with a binary search
+    section_starts, section_names = get_section_boundaries(sections)
     
     # Process all errors
     print(f"\nProcessing {len(errors)} errors...")
@@ -38,11 +37,12 @@ def main():
     # Process the first 10 errors for demonstration (or all if less than 10)
     num_errors_to_display = min(10, len(errors))
     
-    for i in range(len(errors)):
-        error = errors[i]
-        
-        # Identify atoms involved in the error
-        atoms, atom_names_list, residue_info_list, atom_type_list = identify_atoms_from_context(error, sections, topology_file, atom_info)
+    # Identify atoms involved in each error (in parallel for long error lists),
+    # one error at a time so each display follows that error's own messages
+    results = identify_atoms_for_errors(errors, section_starts, section_names, topo_lines, atom_info)
+    
+    for i, (error, result) in enumerate(zip(errors, results)):
+        atoms, atom_names_list, residue_info_list, atom_type_list = result
         
         # Store the atoms, atom names, residue information, and atom types in the error dictionary
         error['atoms'] = atoms
@@ -54,6 +54,9 @@ def main():
         if i < num_errors_to_display:
             display_error_and_atoms(error)
     
+    # Write the messages collected while processing the errors to the screen
+    flush_log()
+    
     # Save the results to a file
     print(f"\nSaving results to {output_file}...")
     save_results(errors, output_file)